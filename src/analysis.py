@@ -0,0 +1,423 @@
+# filename: src/analysis.py
+# Purpose: Run the pre/post (±5d) study and the event-day impact study in a single pass.
+# Each symbol's returns are read once and its aligned event positions are used by both
+# kernels; writes figures/daily_event_min_results.csv and figures/event_day_impact_results.csv.
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from event_alignment import (
+    DATA_DIR,
+    discover_symbols,
+    load_alignment,
+    load_cache_arrays,
+    load_events,
+    price_path,
+    select_events,
+)
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the NumPy paths below are used instead
+    njit = None
+
+try:
+    import bottleneck as bn
+except ImportError:  # bottleneck is optional; NumPy reductions are used instead
+    bn = None
+
+OUT_DIR = "figures"
+PREPOST_CSV = os.path.join(OUT_DIR, "daily_event_min_results.csv")
+IMPACT_CSV = os.path.join(OUT_DIR, "event_day_impact_results.csv")
+os.makedirs(OUT_DIR, exist_ok=True)
+
+# Below this many symbols (or on one CPU) the per-symbol work is cheaper than starting
+# worker processes, which re-import the calling script and its plotting libraries
+POOL_MIN_SYMBOLS = 16
+
+# Columns of figures/daily_event_min_results.csv
+PREPOST_SCHEMA = pa.schema(
+    [
+        ("symbol", pa.string()),
+        ("event", pa.string()),
+        ("event_date", pa.date32()),
+        ("pre_vol", pa.float64()),
+        ("post_vol", pa.float64()),
+        ("vol_delta", pa.float64()),
+        ("pre_mean", pa.float64()),
+        ("post_mean", pa.float64()),
+        ("ret_delta", pa.float64()),
+    ]
+)
+
+# Columns of figures/event_day_impact_results.csv
+IMPACT_SCHEMA = pa.schema(
+    [
+        ("symbol", pa.string()),
+        ("event", pa.string()),
+        ("event_date", pa.date32()),
+        ("event_day_ret", pa.float64()),
+        ("event_day_abs", pa.float64()),
+        ("baseline_abs20", pa.float64()),
+        ("impact_ratio", pa.float64()),
+    ]
+)
+
+
+def load_returns(symbol: str) -> np.ndarray:
+    """
+    Cached daily 'ret' of a symbol as float64 (normalized and NA-free as written by
+    src/data_loader.py); empty if there is no cache. Taken from data/cache.npz when it
+    is current, else only the ret column of the Parquet file is read.
+    """
+    cached = load_cache_arrays(symbol)
+    if cached is not None:
+        return cached[0]
+    path = price_path(symbol)
+    if not os.path.exists(path):
+        return np.empty(0)
+    ret = pq.read_table(path, columns=["ret"]).column("ret")
+    return ret.to_numpy().astype(np.float64, copy=False)
+
+
+# ---------- Pre/post (±5d) kernel ----------
+
+
+def prefix_sums(ret_arr: np.ndarray):
+    """Prefix sums of ret and ret**2 (cs, css): any window mean/std is then O(1)."""
+    cs = np.concatenate(([0.0], np.cumsum(ret_arr)))
+    css = np.concatenate(([0.0], np.cumsum(ret_arr * ret_arr)))
+    return cs, css
+
+
+def window_mean(cs: np.ndarray, a, b):
+    """Mean of ret[a:b] from the prefix-sum array cs (cs[k] = sum of ret[:k])."""
+    return (cs[b] - cs[a]) / (b - a)
+
+
+def window_std(cs: np.ndarray, css: np.ndarray, a, b):
+    """
+    Sample std (ddof=1) of ret[a:b] from prefix sums of ret (cs) and ret**2 (css).
+    Windows with fewer than two observations give NaN, as pandas does.
+    """
+    n = b - a
+    s = cs[b] - cs[a]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = ((css[b] - css[a]) - s * s / n) / (n - 1)
+    # Clamp tiny negative round-off from the subtraction before the sqrt
+    return np.sqrt(np.where(n > 1, np.maximum(var, 0.0), np.nan))
+
+
+def _window_mean_std_loop(cs, css, a, b):
+    """
+    Fused window_mean/window_std over many windows ret[a[i]:b[i]] in a single pass;
+    numba-compilable, so no temporaries are allocated per statistic.
+    """
+    m = a.shape[0]
+    mean = np.empty(m)
+    std = np.empty(m)
+    for i in range(m):
+        n = b[i] - a[i]
+        s = cs[b[i]] - cs[a[i]]
+        mean[i] = s / n
+        if n > 1:
+            var = ((css[b[i]] - css[a[i]]) - s * s / n) / (n - 1)
+            std[i] = np.sqrt(max(var, 0.0))
+        else:
+            std[i] = np.nan
+    return mean, std
+
+
+_window_mean_std_nb = njit(cache=True)(_window_mean_std_loop) if njit else None
+
+
+def compute_prepost(
+    ret_arr: np.ndarray,
+    pos: np.ndarray,
+    pre_days: int = 5,
+    post_days: int = 5,
+):
+    """
+    Pre/post volatility and mean return around every event position in pos.
+    pre: [-5d, -1d], post: [+1d, +5d] relative to the nearest trading day.
+    Returns (valid, stats): a boolean mask over pos and a dict of arrays for the valid
+    events. Events with an empty window or at the start of the series are invalid.
+    """
+    cs, css = prefix_sums(ret_arr)
+    n = len(ret_arr)
+    pos = np.asarray(pos, dtype=np.int64)
+    pre_a, pre_b = np.maximum(0, pos - pre_days), pos
+    post_a, post_b = pos + 1, np.minimum(n, pos + 1 + post_days)
+    valid = (pos > 0) & (pre_b > pre_a) & (post_b > post_a)
+    pre_a, pre_b = pre_a[valid], pre_b[valid]
+    post_a, post_b = post_a[valid], post_b[valid]
+
+    if _window_mean_std_nb is not None:
+        pre_mean, pre_vol = _window_mean_std_nb(cs, css, pre_a, pre_b)
+        post_mean, post_vol = _window_mean_std_nb(cs, css, post_a, post_b)
+    else:
+        pre_vol = window_std(cs, css, pre_a, pre_b)
+        post_vol = window_std(cs, css, post_a, post_b)
+        pre_mean = window_mean(cs, pre_a, pre_b)
+        post_mean = window_mean(cs, post_a, post_b)
+
+    return valid, {
+        "pre_vol": pre_vol,
+        "post_vol": post_vol,
+        "vol_delta": post_vol - pre_vol,
+        "pre_mean": pre_mean,
+        "post_mean": post_mean,
+        "ret_delta": post_mean - pre_mean,
+    }
+
+
+# ---------- Event-day impact kernel ----------
+
+
+def baseline_abs_medians(ret_arr: np.ndarray, window: int = 20) -> np.ndarray:
+    """
+    Median absolute return of every full trailing window, in one vectorized pass.
+    Element k covers ret[k : k + window], i.e. the baseline for position k + window.
+    """
+    if len(ret_arr) < window:
+        return np.empty(0)
+    windows = np.lib.stride_tricks.sliding_window_view(np.abs(ret_arr), window)
+    # bottleneck's median is much cheaper than np.median on short rows
+    median = bn.median if bn is not None else np.median
+    return median(windows, axis=1)
+
+
+def _baseline_abs_loop(ret_arr, pos, window):
+    """Median |ret| over the (up to) window days before each position; numba-compilable."""
+    out = np.empty(pos.shape[0])
+    for i in range(pos.shape[0]):
+        lo = max(0, pos[i] - window)
+        out[i] = np.median(np.abs(ret_arr[lo : pos[i]]))
+    return out
+
+
+# Only the event positions need a baseline, so a compiled loop over them beats
+# computing every window's median; cache=True keeps the machine code across runs
+_baseline_abs_nb = njit(cache=True)(_baseline_abs_loop) if njit else None
+
+
+def compute_impact(
+    ret_arr: np.ndarray,
+    pos: np.ndarray,
+    window: int = 20,
+):
+    """
+    Event-day absolute return vs median absolute return over prior 20 trading days,
+    for every event position in pos.
+    Returns (valid, stats): a mask over pos (events at the start of the series are
+    invalid) and a dict of arrays for the valid events.
+    """
+    pos = np.asarray(pos, dtype=np.int64)
+    valid = pos > 0
+    pos = pos[valid]
+    ret_t0 = ret_arr[pos]
+    if _baseline_abs_nb is not None:
+        baseline_abs = _baseline_abs_nb(ret_arr, pos, window)
+    else:
+        baseline_abs = np.empty(len(pos))
+        full = pos >= window
+        baseline_abs[full] = baseline_abs_medians(ret_arr, window)[pos[full] - window]
+        # Too early in the series for a full window: use what history there is
+        baseline_abs[~full] = _baseline_abs_loop(ret_arr, pos[~full], window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        impact_ratio = np.where(baseline_abs > 0, np.abs(ret_t0) / baseline_abs, np.nan)
+    return valid, {
+        "event_day_ret": ret_t0,
+        "event_day_abs": np.abs(ret_t0),
+        "baseline_abs20": baseline_abs,
+        "impact_ratio": impact_ratio,
+    }
+
+
+# ---------- Fused per-symbol pass ----------
+
+
+def pool_context():
+    """Prefer forkserver workers (pandas imported once by the server) where available."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return None
+
+
+def map_symbols(fn, symbols: list[str], alignment: pd.DataFrame):
+    """
+    Yield fn(sym, rows) for every symbol, in symbol order, where rows are the symbol's
+    rows of the event alignment table. Symbols are independent, so larger universes are
+    mapped over a process pool; small ones run in this process.
+    """
+    by_symbol = dict(tuple(alignment.groupby("symbol")))
+    aligned_by_symbol = [by_symbol.get(sym, alignment.iloc[:0]) for sym in symbols]
+    workers = min(len(symbols), os.cpu_count() or 1)
+    if workers < 2 or len(symbols) < POOL_MIN_SYMBOLS:
+        yield from map(fn, symbols, aligned_by_symbol)
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+        yield from pool.map(fn, symbols, aligned_by_symbol)
+
+
+def prepost_frame(sym: str, aligned: pd.DataFrame) -> pd.DataFrame | None:
+    """
+    Pre/post stats for one symbol at its aligned event positions, as a DataFrame
+    (event_date as datetime.date) for src/daily_event_study.py.
+    None if the cache is unusable.
+    """
+    ret_arr = load_returns(sym)
+    if len(ret_arr) == 0:
+        print(f"[WARN] Empty cache for {sym}, skipping.")
+        return None
+    valid, st = compute_prepost(ret_arr, aligned["pos"].to_numpy())
+    return pd.DataFrame(
+        {
+            "symbol": sym,
+            "event": aligned["event"].to_numpy()[valid],
+            "event_date": aligned["event_date"].dt.date.to_numpy()[valid],
+            **st,
+        }
+    )
+
+
+def _result_batch(sym: str, aligned: pd.DataFrame, valid, st, schema: pa.Schema):
+    """Rows of one symbol's valid events plus their stats as a record batch of schema."""
+    ev = aligned["event"].to_numpy()[valid]
+    columns = {
+        "symbol": [sym] * len(ev),
+        "event": ev,
+        "event_date": aligned["event_date"].to_numpy()[valid].astype("datetime64[D]"),
+        **st,
+    }
+    # from_pandas=True stores NaN stats as nulls, i.e. empty CSV fields
+    return pa.RecordBatch.from_arrays(
+        [pa.array(columns[f.name], type=f.type, from_pandas=True) for f in schema],
+        schema=schema,
+    )
+
+
+def process_symbol(sym: str, aligned: pd.DataFrame):
+    """
+    Both studies for one symbol: ret is loaded once and both kernels run on its aligned
+    event positions (its rows of the event alignment table, flagged 'prepost' / 'impact'
+    for the event subset of each study).
+    Returns (prepost batch, impact batch); (None, None) if the cache is unusable.
+    """
+    ret_arr = load_returns(sym)
+    if len(ret_arr) == 0:
+        print(f"[WARN] Empty or missing cache for {sym}, skipping.")
+        return None, None
+    pos = aligned["pos"].to_numpy()
+
+    in_prepost = aligned["prepost"].to_numpy()
+    valid, st = compute_prepost(ret_arr, pos[in_prepost])
+    prepost = _result_batch(sym, aligned[in_prepost], valid, st, PREPOST_SCHEMA)
+
+    in_impact = aligned["impact"].to_numpy()
+    valid, st = compute_impact(ret_arr, pos[in_impact])
+    impact = _result_batch(sym, aligned[in_impact], valid, st, IMPACT_SCHEMA)
+    return prepost, impact
+
+
+def _in_events(alignment: pd.DataFrame, events: pd.DataFrame) -> np.ndarray:
+    """Mask over the alignment table rows that belong to the given events."""
+    keys = events[["event", "event_date"]].astype({"event_date": "datetime64[ns]"})
+    rows = pd.MultiIndex.from_frame(alignment[["event", "event_date"]])
+    return rows.isin(pd.MultiIndex.from_frame(keys))
+
+
+def run_event_studies(prepost_events: int = 20, impact_events: int = 30):
+    """
+    Pre/post stats over the last prepost_events events and event-day impact over the
+    last impact_events events, for every cached symbol, in one scan of the price cache.
+    Streams figures/daily_event_min_results.csv and figures/event_day_impact_results.csv
+    and prints the median vol/ret deltas and impact ratios.
+    """
+    # 1) Symbols from your cached data
+    symbols = discover_symbols(DATA_DIR)
+    if not symbols:
+        print("No cached data found in data/. Run src/data_loader.py first.")
+        return
+    print("Symbols discovered:", symbols)
+
+    # 2) Load CPI/NFP event dates; keep small recent subsets for concise output
+    events = load_events()
+    # Nearest-trading-day positions come from the shared alignment table, selected
+    # once for the union of both subsets (events are sorted, so the longer tail)
+    alignment = select_events(
+        load_alignment(), events.tail(max(prepost_events, impact_events))
+    )
+    alignment["prepost"] = _in_events(alignment, events.tail(prepost_events))
+    alignment["impact"] = _in_events(alignment, events.tail(impact_events))
+
+    # 3) Compute both studies per symbol (symbols are independent) and stream the rows
+    #    of each into its CSV as workers finish (in symbol order). Rows go to a .partial
+    #    file that replaces the previous CSV only once every symbol has succeeded
+    outputs = [(PREPOST_CSV, PREPOST_SCHEMA), (IMPACT_CSV, IMPACT_SCHEMA)]
+    partials = [f"{path}.partial" for path, _ in outputs]
+    writers = [None, None]
+    prepost_medians, impact_medians = [], []
+    try:
+        for batches in map_symbols(process_symbol, symbols, alignment):
+            for i, batch in enumerate(batches):
+                if batch is None or batch.num_rows == 0:
+                    continue
+                if writers[i] is None:
+                    writers[i] = pa_csv.CSVWriter(partials[i], outputs[i][1])
+                writers[i].write_batch(batch)
+            # A batch holds one symbol, so per-batch (symbol, event) medians are exact
+            prepost, impact = batches
+            if prepost is not None and prepost.num_rows:
+                prepost_medians.append(
+                    prepost.to_pandas()
+                    .groupby(["symbol", "event"])[["vol_delta", "ret_delta"]]
+                    .median()
+                )
+            if impact is not None and impact.num_rows:
+                impact_medians.append(
+                    impact.to_pandas()
+                    .groupby(["symbol", "event"])["impact_ratio"]
+                    .median()
+                )
+    except BaseException:
+        for writer, partial in zip(writers, partials):
+            if writer is not None:
+                writer.close()
+                os.remove(partial)
+        raise
+    for writer, partial, (path, _) in zip(writers, partials, outputs):
+        if writer is not None:
+            writer.close()
+            os.replace(partial, path)
+
+    # 4) Print concise medians
+    if prepost_medians:
+        print(f"\nMedian pre/post deltas (last ~{prepost_events} events):")
+        print(pd.concat(prepost_medians))
+        print(f"\nSaved {PREPOST_CSV}")
+    else:
+        print("No pre/post results (check symbols or widen event subset).")
+
+    if impact_medians:
+        print(
+            f"\nMedian impact ratio (|event-day| / median |return| last 20d, "
+            f"last ~{impact_events} events):"
+        )
+        print(pd.concat(impact_medians))
+        print(f"\nSaved {IMPACT_CSV}")
+    else:
+        print("No impact results. Check symbols or widen date range.")
+
+
+def main():
+    run_event_studies()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,15 @@
 # - Console prints of the same conclusions
 
 import os
-import math
+import numpy as np
 import pandas as pd
 from scipy import stats
 
+try:
+    import bottleneck as bn
+except ImportError:  # bottleneck is optional; NumPy nan-reductions are used instead
+    bn = None
+
 PREPOST_CSV = "figures/daily_event_min_results.csv"
 IMPACT_CSV = "figures/event_day_impact_results.csv"
 SUMMARY_TXT = "figures/basic_tests_summary.txt"
@@ -25,46 +30,100 @@ MIN_N = 5  # minimum observations to run a test
 ALPHA = 0.05  # significance threshold
 
 
-def explain_vol_delta(symbol, event, mean_val, n, t, p):
+# Conclusion templates, filled per (symbol, event) group by render_conclusions
+NOT_ENOUGH_OBS = "{symbol} ({event}): Not enough observations (n={n})."
+NOT_ENOUGH_DATA = "{symbol} ({event}): Not enough data."
+VOL_SIG = (
+    "{symbol} ({event}): Statistically significant change in post vs pre volatility "
+    "(mean Δ={mean:.6f}, n={n}, t={t:.2f}, p={p:.3g}). "
+    "This means daily noise is {direction} in the 5 days after the event compared to the 5 days before."
+)
+VOL_NONSIG = (
+    "{symbol} ({event}): Not statistically different from zero (mean Δ={mean:.6f}, n={n}, t={t:.2f}, p={p:.3g}). "
+    "This means typical events do not change daily volatility in a consistent way for this asset."
+)
+IMPACT_SIG = (
+    "{symbol} ({event}): Statistically significant difference from typical day (mean ratio={mean:.3f}, "
+    "n={n}, t={t:.2f}, p={p:.3g}). This means {direction} relative to the prior 20-day baseline."
+)
+IMPACT_NONSIG = (
+    "{symbol} ({event}): Not statistically different from typical day (mean ratio={mean:.3f}, "
+    "n={n}, t={t:.2f}, p={p:.3g}). This means event-day moves are broadly in line with recent norms."
+)
+
+
+def render_conclusions(keys, n, mean, t, p, direction, sig_template, nonsig_template):
+    """
+    One conclusion string per group. The template for each group is picked with
+    vectorized masks (too few observations / no data / significant / not), then all
+    rows are filled in a single pass over itertuples.
+    """
+    out = pd.DataFrame(
+        {
+            "symbol": keys.get_level_values("symbol"),
+            "event": keys.get_level_values("event"),
+            "n": n,
+            "mean": mean,
+            "t": t,
+            "p": p,
+            "direction": direction,
+        }
+    )
+    out["template"] = np.select(
+        [n < MIN_N, np.isnan(mean), p < ALPHA],
+        [NOT_ENOUGH_OBS, NOT_ENOUGH_DATA, sig_template],
+        nonsig_template,
+    )
+    return [r.template.format(**r._asdict()) for r in out.itertuples(index=False)]
+
+
+def explain_vol_delta(keys, n, mean, t, p):
     # Directional interpretation
-    if math.isnan(mean_val):
-        return f"{symbol} ({event}): Not enough data."
-    direction = "higher" if mean_val > 0 else "lower" if mean_val < 0 else "no change"
-    sig = p < ALPHA
-    if sig:
-        return (
-            f"{symbol} ({event}): Statistically significant change in post vs pre volatility "
-            f"(mean Δ={mean_val:.6f}, n={n}, t={t:.2f}, p={p:.3g}). "
-            f"This means daily noise is {direction} in the 5 days after the event compared to the 5 days before."
-        )
-    else:
-        return (
-            f"{symbol} ({event}): Not statistically different from zero (mean Δ={mean_val:.6f}, n={n}, t={t:.2f}, p={p:.3g}). "
-            f"This means typical events do not change daily volatility in a consistent way for this asset."
-        )
-
-
-def explain_impact_ratio(symbol, event, mean_ratio, n, t, p):
+    direction = np.select([mean > 0, mean < 0], ["higher", "lower"], "no change")
+    return render_conclusions(keys, n, mean, t, p, direction, VOL_SIG, VOL_NONSIG)
+
+
+def explain_impact_ratio(keys, n, mean, t, p):
     # Directional interpretation relative to 1
-    if math.isnan(mean_ratio):
-        return f"{symbol} ({event}): Not enough data."
-    if mean_ratio > 1:
-        dir_text = "larger-than-usual moves on event days"
-    elif mean_ratio < 1:
-        dir_text = "smaller-than-usual moves on event days"
-    else:
-        dir_text = "typical-sized moves on event days"
-    sig = p < ALPHA
-    if sig:
-        return (
-            f"{symbol} ({event}): Statistically significant difference from typical day (mean ratio={mean_ratio:.3f}, "
-            f"n={n}, t={t:.2f}, p={p:.3g}). This means {dir_text} relative to the prior 20-day baseline."
-        )
-    else:
-        return (
-            f"{symbol} ({event}): Not statistically different from typical day (mean ratio={mean_ratio:.3f}, "
-            f"n={n}, t={t:.2f}, p={p:.3g}). This means event-day moves are broadly in line with recent norms."
-        )
+    direction = np.select(
+        [mean > 1, mean < 1],
+        [
+            "larger-than-usual moves on event days",
+            "smaller-than-usual moves on event days",
+        ],
+        "typical-sized moves on event days",
+    )
+    return render_conclusions(keys, n, mean, t, p, direction, IMPACT_SIG, IMPACT_NONSIG)
+
+
+def group_ttests(df: pd.DataFrame, col: str, popmean: float):
+    """
+    One-sample t-tests of df[col] against popmean for every (symbol, event) group at once.
+    Groups are padded into a NaN-filled 2D array (one row per group) and reduced along
+    axis=1; only groups with at least MIN_N observations are tested.
+    Returns (group keys, n, mean, t, p) with NaN stats for untested groups.
+    """
+    keys = ["symbol", "event"]
+    obs = df.groupby(keys).cumcount()
+    wide = df.assign(obs=obs).pivot(index=keys, columns="obs", values=col)
+    A = wide.to_numpy(dtype=float)
+
+    n = np.sum(~np.isnan(A), axis=1)
+    mean = np.full(len(A), np.nan)
+    t = np.full(len(A), np.nan)
+    p = np.full(len(A), np.nan)
+    ok = n >= MIN_N
+    if ok.any():
+        # Same statistic as stats.ttest_1samp(..., nan_policy="omit"), computed for all
+        # rows together instead of slice by slice
+        nanmean = bn.nanmean if bn is not None else np.nanmean
+        nanstd = bn.nanstd if bn is not None else np.nanstd
+        mean[ok] = nanmean(A[ok], axis=1)
+        se = nanstd(A[ok], axis=1, ddof=1) / np.sqrt(n[ok])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t[ok] = (mean[ok] - popmean) / se
+        p[ok] = 2 * stats.t.sf(np.abs(t[ok]), n[ok] - 1)
+    return wide.index, n, mean, t, p
 
 
 def run_vol_delta_tests():
@@ -72,16 +131,10 @@ def run_vol_delta_tests():
         raise FileNotFoundError(f"Missing {PREPOST_CSV}. Run daily_event_min.py first.")
     df = pd.read_csv(PREPOST_CSV)
     df = df.dropna(subset=["vol_delta"])
-    conclusions = []
-    for (sym, ev), grp in df.groupby(["symbol", "event"]):
-        x = grp["vol_delta"].astype(float).dropna()
-        if len(x) >= MIN_N:
-            t, p = stats.ttest_1samp(x, 0.0, nan_policy="omit")
-            mean_val = x.mean()
-            conclusions.append(explain_vol_delta(sym, ev, mean_val, len(x), t, p))
-        else:
-            conclusions.append(f"{sym} ({ev}): Not enough observations (n={len(x)}).")
-    return conclusions
+    if df.empty:
+        return []
+    keys, n, mean, t, p = group_ttests(df, "vol_delta", 0.0)
+    return explain_vol_delta(keys, n, mean, t, p)
 
 
 def run_impact_ratio_tests():
@@ -89,16 +142,10 @@ def run_impact_ratio_tests():
         raise FileNotFoundError(f"Missing {IMPACT_CSV}. Run event_day_impact.py first.")
     df = pd.read_csv(IMPACT_CSV)
     df = df.dropna(subset=["impact_ratio"])
-    conclusions = []
-    for (sym, ev), grp in df.groupby(["symbol", "event"]):
-        x = grp["impact_ratio"].astype(float).dropna()
-        if len(x) >= MIN_N:
-            t, p = stats.ttest_1samp(x, 1.0, nan_policy="omit")  # H0: mean == 1
-            mean_ratio = x.mean()
-            conclusions.append(explain_impact_ratio(sym, ev, mean_ratio, len(x), t, p))
-        else:
-            conclusions.append(f"{sym} ({ev}): Not enough observations (n={len(x)}).")
-    return conclusions
+    if df.empty:
+        return []
+    keys, n, mean, t, p = group_ttests(df, "impact_ratio", 1.0)  # H0: mean == 1
+    return explain_impact_ratio(keys, n, mean, t, p)
 
 
 def main():
@@ -5,62 +5,62 @@
 # Automatically discovers which assets exist in data/.
 
 import os
-import re
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
 import matplotlib.pyplot as plt
 import seaborn as sns
+from event_alignment import (
+    DATA_DIR,
+    discover_symbols,
+    load_alignment,
+    load_cache_arrays,
+    load_events,
+    price_date_column,
+    price_path,
+    select_events,
+)
+from analysis import map_symbols, prepost_frame
 
-DATA_DIR = "data"
 FIG_DIR = "figures"
 os.makedirs(FIG_DIR, exist_ok=True)
 
 
-def discover_symbols(data_dir: str = DATA_DIR) -> list[str]:
+def load_returns_panel(symbols: list[str]) -> pd.DataFrame:
     """
-    Find cached daily parquet files and return Stooq-style symbols.
-    Example: 'SPY_US_daily.parquet' -> 'SPY.US'
+    Aligned date x symbol panel of daily returns, read from the cached Parquet files
+    as one Arrow dataset and pivoted once (or built from data/cache.npz when it is
+    current for every symbol). Dates missing for any symbol are dropped.
     """
-    syms = []
-    for f in os.listdir(data_dir):
-        m = re.match(r"(.+)_daily\.parquet$", f)
-        if m:
-            sym = m.group(1).replace("_", ".")
-            syms.append(sym)
-    return sorted(syms)
-
-
-def load_cached_price(symbol: str) -> pd.DataFrame:
-    """
-    Load cached daily price from data/, ensure 'ret' exists.
-    """
-    path = os.path.join(DATA_DIR, f"{symbol.replace('.', '_')}_daily.parquet")
-    if not os.path.exists(path):
-        return pd.DataFrame()
-    df = pd.read_parquet(path)
-    df.columns = [c.lower() for c in df.columns]
-    if "ret" not in df.columns and "close" in df.columns:
-        df["ret"] = df["close"].pct_change()
-    return df.dropna()
-
-
-def load_events(path: str = os.path.join(DATA_DIR, "events.parquet")) -> pd.DataFrame:
-    """
-    Load CPI/NFP events created by src/event_loader.py.
-    Expected columns: ['event','event_date','value'].
-    """
-    if not os.path.exists(path):
-        raise FileNotFoundError(
-            f"Missing events file: {path}. Run src/event_loader.py first."
-        )
-    ev = pd.read_parquet(path)
-    ev["event_date"] = pd.to_datetime(ev["event_date"])
-    return ev.sort_values("event_date")
+    cached = [load_cache_arrays(sym) for sym in symbols]
+    if cached and all(c is not None for c in cached):
+        panel_df = pd.concat(
+            {
+                sym: pd.Series(ret, index=pd.DatetimeIndex(idx, name="date"))
+                for sym, (ret, idx) in zip(symbols, cached)
+            },
+            axis=1,
+        ).sort_index(axis=1)
+        return panel_df.dropna(how="any")
+    paths = {price_path(sym): sym for sym in symbols}
+    dataset = ds.dataset(list(paths), format="parquet")
+    tables = []
+    for frag in dataset.get_fragments():
+        # Older caches store the index as 'Date'; normalize it to 'date' here
+        date_col = price_date_column(frag.physical_schema)
+        t = frag.to_table(columns=[date_col, "ret"]).rename_columns(["date", "ret"])
+        sym = pa.array([paths[frag.path]] * t.num_rows, type=pa.string())
+        tables.append(t.append_column("symbol", sym))
+    long_df = pa.concat_tables(tables).to_pandas(ignore_metadata=True)
+    panel_df = long_df.pivot(index="date", columns="symbol", values="ret")
+    return panel_df.rename_axis(columns=None).dropna(how="any")
 
 
 def nearest_pos(index: pd.Index, when: pd.Timestamp) -> int | None:
     """
-    Nearest trading index position to a calendar timestamp.
+    Nearest trading index position to a single calendar timestamp.
+    Event loops should batch through index.get_indexer instead.
     """
     try:
         nearest = index[index.get_indexer([when], method="nearest")]
@@ -71,36 +71,6 @@ def nearest_pos(index: pd.Index, when: pd.Timestamp) -> int | None:
         return None
 
 
-def window_stats(
-    price_df: pd.DataFrame,
-    event_date: pd.Timestamp,
-    pre_days: int = 5,
-    post_days: int = 5,
-):
-    """
-    Pre [-5d,-1d] vs Post [+1d,+5d] stats around nearest trading day to event_date.
-    Returns None if windows are empty.
-    """
-    if price_df.empty or "ret" not in price_df.columns:
-        return None
-    idx = price_df.index
-    pos = nearest_pos(idx, pd.Timestamp(event_date))
-    if pos is None:
-        return None
-    pre = price_df.iloc[max(0, pos - pre_days) : pos]
-    post = price_df.iloc[pos + 1 : min(len(price_df), pos + 1 + post_days)]
-    if pre.empty or post.empty:
-        return None
-    return {
-        "pre_vol": pre["ret"].std(ddof=1),
-        "post_vol": post["ret"].std(ddof=1),
-        "vol_delta": post["ret"].std(ddof=1) - pre["ret"].std(ddof=1),
-        "pre_mean": pre["ret"].mean(),
-        "post_mean": post["ret"].mean(),
-        "ret_delta": post["ret"].mean() - pre["ret"].mean(),
-    }
-
-
 def main():
     # Discover cached assets and load their prices
     symbols = discover_symbols(DATA_DIR)
@@ -108,36 +78,25 @@ def main():
         print("No cached prices found in data/. Run src/data_loader.py first.")
         return
 
-    prices = {}
-    for sym in symbols:
-        df = load_cached_price(sym)
-        if df.empty:
-            print(f"[WARN] Empty cache for {sym}, skipping.")
-            continue
-        prices[sym] = df
-    if not prices:
+    # Load events
+    events = load_events()
+    # Nearest-trading-day positions come from the shared alignment table
+    alignment = select_events(load_alignment(), events)
+
+    # Load prices and compute pre/post stats for all assets and events, one task per symbol
+    results = list(map_symbols(prepost_frame, symbols, alignment))
+
+    loaded = [sym for sym, stats_df in zip(symbols, results) if stats_df is not None]
+    if not loaded:
         print("No usable cached prices. Check data/ contents.")
         return
-    print("Loaded symbols:", list(prices.keys()))
+    print("Loaded symbols:", loaded)
 
-    # Load events
-    events = load_events()
+    frames = [
+        stats_df for stats_df in results if stats_df is not None and not stats_df.empty
+    ]
 
-    # Compute pre/post stats for all assets and events
-    rows = []
-    for sym, df in prices.items():
-        for _, e in events.iterrows():
-            st = window_stats(df, e["event_date"])
-            if st:
-                rows.append(
-                    {
-                        "symbol": sym,
-                        "event": e["event"],
-                        "event_date": e["event_date"].date(),
-                        **st,
-                    }
-                )
-    res = pd.DataFrame(rows)
+    res = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     print("Rows:", len(res))
     if res.empty:
         print("No results. Check assets or event coverage.")
@@ -164,10 +123,7 @@ def main():
 
     # Figure 2: Correlation delta heatmap around most recent CPI
     # Build aligned returns panel from whatever assets are cached
-    panel = []
-    for sym, df in prices.items():
-        panel.append(df[["ret"]].rename(columns={"ret": sym}))
-    panel_df = pd.concat(panel, axis=1).dropna(how="any")
+    panel_df = load_returns_panel(loaded)
     last_cpi = events[events["event"] == "CPI"]["event_date"].max()
     last_cpi_ts = pd.Timestamp(last_cpi)
     idx = panel_df.index
@@ -180,10 +136,18 @@ def main():
     if pre.empty or post.empty:
         print("Insufficient pre/post data for correlation panel.")
         return
-    corr_delta = post.corr() - pre.corr()
+    # Raw np.corrcoef on the (NA-free) panel slices instead of two pandas .corr() calls;
+    # atleast_2d keeps a single-asset panel 1x1, errstate hides constant-column warnings
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr_delta = np.atleast_2d(
+            np.corrcoef(post.to_numpy(), rowvar=False)
+        ) - np.atleast_2d(np.corrcoef(pre.to_numpy(), rowvar=False))
+    corr_delta_df = pd.DataFrame(
+        corr_delta, index=panel_df.columns, columns=panel_df.columns
+    )
 
     plt.figure(figsize=(8, 6))
-    sns.heatmap(corr_delta, vmin=-0.5, vmax=0.5, cmap="coolwarm", annot=False)
+    sns.heatmap(corr_delta_df, vmin=-0.5, vmax=0.5, cmap="coolwarm", annot=False)
     plt.title("Correlation Delta (Post − Pre) around last CPI")
     plt.tight_layout()
     out_corr = os.path.join(FIG_DIR, "daily_corr_delta_cpi.png")
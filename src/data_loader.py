@@ -2,11 +2,15 @@
 # Purpose: Fetch FREE daily prices from Stooq, compute returns, cache to data/, print a summary.
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import List, Dict
+import numpy as np
 import pandas as pd
 from pandas_datareader import data as web
 
 DATA_DIR = "data"
+CACHE_NPZ = os.path.join(DATA_DIR, "cache.npz")
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # US listings on Stooq must end with .US (e.g., SPY.US). FX pairs have no suffix (EURUSD, USDJPY).
@@ -23,12 +27,15 @@ ASSETS: Dict[str, str] = {
 }
 
 START_DATE = "2021-01-01"  # adjust as needed
+FETCH_WORKERS = 8  # concurrent Stooq requests; fetches are network-bound
 
 
 def fetch_stooq(symbol: str, start: str = START_DATE) -> pd.DataFrame:
     """
     Download daily data from Stooq, sort ascending, lowercase columns, compute daily returns.
-    Returns a tidy DataFrame with columns: ['open','high','low','close','volume','ret'].
+    Returns a tidy DataFrame with columns: ['open','high','low','close','volume','ret']
+    indexed by 'date'. This is the only place the cache is normalized: readers load the
+    Parquet file as-is.
     """
     try:
         df = web.DataReader(symbol, "stooq", start=start)
@@ -40,8 +47,8 @@ def fetch_stooq(symbol: str, start: str = START_DATE) -> pd.DataFrame:
         print(f"[WARN] No data for {symbol} from Stooq.")
         return pd.DataFrame()
 
-    # Stooq returns latest-first; sort ascending and normalize columns
-    df = df.sort_index().rename(columns=str.lower)
+    # Stooq returns latest-first; sort ascending and normalize column/index names
+    df = df.sort_index().rename(columns=str.lower).rename_axis("date")
 
     # Ensure 'close' exists (defensive)
     if "close" not in df.columns:
@@ -50,14 +57,15 @@ def fetch_stooq(symbol: str, start: str = START_DATE) -> pd.DataFrame:
         )
         return pd.DataFrame()
 
-    # Daily returns
+    # Daily returns; only 'ret' gets NaN from pct_change, so mask on that one column
+    # rather than scanning every OHLCV column with dropna()
     df["ret"] = df["close"].pct_change()
-    df = df.dropna()
+    df = df.iloc[df["ret"].notna().to_numpy()]
 
     # Cache to Parquet
     out_path = os.path.join(DATA_DIR, f"{symbol.replace('.', '_')}_daily.parquet")
     try:
-        df.to_parquet(out_path)
+        df.to_parquet(out_path, engine="pyarrow", compression="zstd")
     except Exception as e:
         print(f"[WARN] Parquet write failed for {symbol}: {e}. Writing CSV instead.")
         df.to_csv(out_path.replace(".parquet", ".csv"))
@@ -70,9 +78,28 @@ def main():
     print("Assets:", list(ASSETS.keys()))
     print("Data directory:", os.path.abspath(DATA_DIR))
 
+    # Fetch all symbols concurrently: HTTP waits release the GIL, so threads overlap them
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        results = dict(
+            zip(ASSETS, pool.map(partial(fetch_stooq, start=START_DATE), ASSETS))
+        )
+
+    # One archive of every symbol's float64 'ret' and int64 (ns) dates, so the analysis
+    # scripts skip the Parquet decode; keys are e.g. SPY_US_ret / SPY_US_idx
+    arrays = {}
+    for sym, df in results.items():
+        if df.empty:
+            continue
+        sym_safe = sym.replace(".", "_")
+        arrays[f"{sym_safe}_ret"] = df["ret"].to_numpy(dtype=np.float64)
+        arrays[f"{sym_safe}_idx"] = df.index.values.astype("datetime64[ns]").view(
+            np.int64
+        )
+    if arrays:
+        np.savez(CACHE_NPZ, **arrays)
+
     shapes = {}
-    for sym in ASSETS.keys():
-        df = fetch_stooq(sym, start=START_DATE)
+    for sym, df in results.items():
         shapes[sym] = df.shape
         print(f"{sym}: {df.shape}")
 
@@ -0,0 +1,173 @@
+# filename: src/event_alignment.py
+# Purpose: Snap every CPI/NFP event to its nearest trading day for every cached symbol, once.
+# Writes figures/event_positions.parquet (symbol, event, event_date, pos) so the analysis
+# scripts only do math on the cached price arrays.
+
+import os
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+DATA_DIR = "data"
+OUT_DIR = "figures"
+EVENTS_PATH = os.path.join(DATA_DIR, "events.parquet")
+CACHE_NPZ = os.path.join(DATA_DIR, "cache.npz")
+ALIGNMENT_PATH = os.path.join(OUT_DIR, "event_positions.parquet")
+os.makedirs(OUT_DIR, exist_ok=True)
+
+
+def discover_symbols(data_dir: str = DATA_DIR) -> list[str]:
+    """Find cached daily parquet files and return Stooq-style symbols."""
+    suffix = "_daily.parquet"
+    with os.scandir(data_dir) as entries:
+        # Plain suffix check on the cached dir entries; the prefix must be non-empty
+        return sorted(
+            e.name[: -len(suffix)].replace("_", ".")
+            for e in entries
+            if e.is_file() and e.name.endswith(suffix) and len(e.name) > len(suffix)
+        )
+
+
+def price_path(symbol: str) -> str:
+    """Cache path for a Stooq symbol, e.g. 'SPY.US' -> data/SPY_US_daily.parquet."""
+    return os.path.join(DATA_DIR, f"{symbol.replace('.', '_')}_daily.parquet")
+
+
+def price_date_column(schema) -> str:
+    """
+    Name of the stored date index in a cached price file's Arrow schema, from its pandas
+    metadata: 'date' for caches written by src/data_loader.py, 'Date' (Stooq's own
+    index name) for caches written before the index was renamed.
+    """
+    meta = schema.pandas_metadata or {}
+    names = [c for c in meta.get("index_columns", []) if isinstance(c, str)]
+    return names[0] if names else "date"
+
+
+def load_cache_arrays(symbol: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    (ret, dates) of a symbol from data/cache.npz written by src/data_loader.py, as
+    float64 / datetime64[ns] arrays. None if the archive is missing, lacks the symbol or
+    is older than the symbol's Parquet file, so readers fall back to the Parquet file.
+    Alignment and the analyses both prefer this archive, so pos indexes the same rows.
+    np.load cannot memory-map .npz members; each member is read only when accessed.
+    """
+    path = price_path(symbol)
+    if not (os.path.exists(CACHE_NPZ) and os.path.exists(path)):
+        return None
+    if os.path.getmtime(path) > os.path.getmtime(CACHE_NPZ):
+        return None
+    key = symbol.replace(".", "_")
+    with np.load(CACHE_NPZ) as z:
+        if f"{key}_ret" not in z.files:
+            return None
+        return z[f"{key}_ret"], z[f"{key}_idx"].view("datetime64[ns]")
+
+
+def load_price_dates(symbol: str) -> np.ndarray:
+    """
+    Trading dates of a cached symbol as datetime64[ns], from data/cache.npz when it is
+    current, else from the Parquet file (only the date column is read).
+    """
+    cached = load_cache_arrays(symbol)
+    if cached is not None:
+        return cached[1]
+    path = price_path(symbol)
+    if not os.path.exists(path):
+        return np.empty(0, dtype="datetime64[ns]")
+    date_col = price_date_column(pq.read_schema(path))
+    dates = pq.read_table(path, columns=[date_col]).column(date_col)
+    return dates.to_numpy().astype("datetime64[ns]")
+
+
+def load_events(path: str = EVENTS_PATH) -> pd.DataFrame:
+    """Load CPI/NFP events created by src/event_loader.py."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Missing events file: {path}. Run src/event_loader.py first."
+        )
+    return pd.read_parquet(path)  # event_date is stored as sorted datetime64[ns]
+
+
+def align_events(events: pd.DataFrame, idx_arr: np.ndarray) -> pd.DataFrame:
+    """
+    Snap every event to its nearest trading day with a single get_indexer call.
+    Returns events (sorted by event_date) with the matched 'date' and its integer 'pos'.
+    Ties (e.g. a release dated on a holiday between two trading days) go to the later
+    day, so the event day is never measured before the release.
+    """
+    aligned = (
+        events[["event", "event_date"]]
+        .astype({"event_date": "datetime64[ns]"})
+        .sort_values("event_date", kind="stable")
+        .reset_index(drop=True)
+    )
+    idx = pd.DatetimeIndex(idx_arr)
+    pos = idx.get_indexer(pd.DatetimeIndex(aligned["event_date"]), method="nearest")
+    aligned["date"] = idx_arr[pos]
+    aligned["pos"] = pos
+    return aligned
+
+
+def build_alignment() -> pd.DataFrame:
+    """
+    Align all events against every cached symbol and save figures/event_positions.parquet.
+    pos indexes the rows of the symbol's cached price file.
+    """
+    events = load_events()
+    frames = []
+    for sym in discover_symbols(DATA_DIR):
+        idx_arr = load_price_dates(sym)
+        if len(idx_arr) == 0:
+            continue
+        aligned = align_events(events, idx_arr)
+        aligned.insert(0, "symbol", sym)
+        frames.append(aligned[["symbol", "event", "event_date", "pos"]])
+    if frames:
+        table = pd.concat(frames, ignore_index=True)
+    else:
+        # Typed empty frame so the parquet schema matches a populated table
+        table = pd.DataFrame(
+            {
+                "symbol": pd.Series(dtype=str),
+                "event": pd.Series(dtype=str),
+                "event_date": pd.Series(dtype="datetime64[ns]"),
+                "pos": pd.Series(dtype=np.int64),
+            }
+        )
+    table.to_parquet(ALIGNMENT_PATH, index=False)
+    return table
+
+
+def load_alignment() -> pd.DataFrame:
+    """
+    Read figures/event_positions.parquet, rebuilding it first if it is missing or
+    older than the events file, data/cache.npz or any cached price file.
+    """
+    inputs = [EVENTS_PATH, CACHE_NPZ]
+    inputs += [price_path(sym) for sym in discover_symbols(DATA_DIR)]
+    if os.path.exists(ALIGNMENT_PATH):
+        built = os.path.getmtime(ALIGNMENT_PATH)
+        if all(os.path.getmtime(p) <= built for p in inputs if os.path.exists(p)):
+            return pd.read_parquet(ALIGNMENT_PATH)
+    return build_alignment()
+
+
+def select_events(alignment: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """Restrict the alignment table to the given subset of events (e.g. the most recent N)."""
+    keys = events[["event", "event_date"]].astype({"event_date": "datetime64[ns]"})
+    return alignment.merge(keys, on=["event", "event_date"], how="inner")
+
+
+def main():
+    alignment = build_alignment()
+    if alignment.empty:
+        print("No cached data found in data/. Run src/data_loader.py first.")
+        return
+    n_events = alignment[["event", "event_date"]].drop_duplicates().shape[0]
+    print(f"Aligned {n_events} events across {alignment['symbol'].nunique()} symbols.")
+    print(f"Saved {ALIGNMENT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
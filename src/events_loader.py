@@ -1,5 +1,7 @@
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pandas_datareader import data as web
 
 DATA_DIR = "data"
@@ -14,7 +16,7 @@ def fred(series_id: str) -> pd.DataFrame:
     return df
 
 
-def cpi_yoy_events() -> pd.DataFrame:
+def cpi_yoy_events() -> pa.Table:
     """
     CPI as YoY %:
     - Start with CPI level (CPIAUCSL)
@@ -24,39 +26,42 @@ def cpi_yoy_events() -> pd.DataFrame:
     cpi = fred("CPIAUCSL").asfreq("MS")
     cpi["yoy_pct"] = cpi["value"].pct_change(12) * 100
     cpi = cpi.dropna()[["yoy_pct"]]
-    out = pd.DataFrame(
+    out = pa.table(
         {
-            "event": "CPI",
-            "event_date": cpi.index.date,
-            "value": cpi["yoy_pct"].values,  # YoY % inflation
+            "event": pa.array(["CPI"] * len(cpi)),
+            "event_date": pa.array(cpi.index.to_numpy(), type=pa.timestamp("ns")),
+            "value": pa.array(cpi["yoy_pct"].to_numpy()),  # YoY % inflation
         }
     )
     return out
 
 
-def nfp_events() -> pd.DataFrame:
+def nfp_events() -> pa.Table:
     """
     NFP level (PAYEMS):
     - Use monthly level (thousands)
     - Keep monthly dates as event_date
     """
     nfp = fred("PAYEMS").asfreq("MS").dropna()[["value"]]
-    out = pd.DataFrame(
+    out = pa.table(
         {
-            "event": "NFP",
-            "event_date": nfp.index.date,
-            "value": nfp["value"].values,  # employment level (thousands)
+            "event": pa.array(["NFP"] * len(nfp)),
+            "event_date": pa.array(nfp.index.to_numpy(), type=pa.timestamp("ns")),
+            "value": pa.array(nfp["value"].to_numpy()),  # employment level (thousands)
         }
     )
     return out
 
 
-def build_events() -> pd.DataFrame:
-    """Combine CPI and NFP into a single tidy table and save to data/events.parquet."""
-    cpi_df = cpi_yoy_events()
-    nfp_df = nfp_events()
-    events = pd.concat([cpi_df, nfp_df], ignore_index=True).sort_values("event_date")
-    events.to_parquet(os.path.join(DATA_DIR, "events.parquet"))
+def build_events() -> pa.Table:
+    """
+    Combine CPI and NFP into a single tidy table and save to data/events.parquet.
+    event_date is written as timestamp[ns] in sorted order, so readers use it as-is.
+    """
+    cpi_tbl = cpi_yoy_events()
+    nfp_tbl = nfp_events()
+    events = pa.concat_tables([cpi_tbl, nfp_tbl]).sort_by("event_date")
+    pq.write_table(events, os.path.join(DATA_DIR, "events.parquet"), compression="zstd")
     return events
 
 
@@ -64,5 +69,5 @@ if __name__ == "__main__":
     ev = build_events()
     print("Saved data/events.parquet")
     print("Preview:")
-    print(ev.tail(6))
+    print(ev.slice(max(0, ev.num_rows - 6)).to_pandas())
     print("\nDone. Next: run daily_event_min.py or daily_event_study.py.")